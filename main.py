@@ -2,14 +2,27 @@
 FastAPI Backend for Personal Finance Manager
 Handles cloud backup and restore operations with MySQL
 """
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from pydantic import BaseModel
-from typing import List, Optional, Dict, Any
-import mysql.connector
-from mysql.connector import Error
+from typing import Annotated, List, Optional, Dict, Any, Union
+from mysql.connector import Error, pooling
+from mysql.connector.errors import DataError, PoolError
+import datetime
+from functools import lru_cache
+from itertools import islice
+import anyio
+import asyncio
 import logging
+import mmap
+import msgspec
+import orjson
 import os
+import re
+import tempfile
+import time
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -23,7 +36,8 @@ logger = logging.getLogger(__name__)
 app = FastAPI(
     title="Personal Finance Manager API",
     description="Cloud backup and restore API for Personal Finance Manager",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
 
 # Configure CORS for mobile app access
@@ -35,53 +49,219 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Directory for the temporary files fed to LOAD DATA LOCAL INFILE
+BACKUP_STAGING_DIR = os.path.join(tempfile.gettempdir(), "pfm-backup-staging")
+
 # MySQL Connection Configuration from environment variables
 DB_CONFIG = {
     "charset": os.getenv("DB_CHARSET", "utf8mb4"),
+    # Compress the MySQL protocol; backup rows are repetitive text
+    "compress": os.getenv("DB_COMPRESS", "1") == "1",
     "connection_timeout": int(os.getenv("DB_CONNECTION_TIMEOUT", "10")),
     "database": os.getenv("DB_NAME"),
     "host": os.getenv("DB_HOST"),
     "password": os.getenv("DB_PASSWORD"),
     "port": int(os.getenv("DB_PORT", "3306")),
-    "user": os.getenv("DB_USER")
+    "user": os.getenv("DB_USER"),
+    # LOAD DATA LOCAL INFILE is limited to the backup staging files
+    "allow_local_infile_in_path": BACKUP_STAGING_DIR
 }
 
+# Connections kept open in the shared pool; each /restore borrows three
+# at once, and mysql-connector allows at most 32
+MIN_DB_POOL_SIZE = 3
+MAX_DB_POOL_SIZE = pooling.CNX_POOL_MAXSIZE
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+if not MIN_DB_POOL_SIZE <= DB_POOL_SIZE <= MAX_DB_POOL_SIZE:
+    logger.warning(f"DB_POOL_SIZE={DB_POOL_SIZE} is out of range, "
+                   f"clamping to {MIN_DB_POOL_SIZE}..{MAX_DB_POOL_SIZE}")
+    DB_POOL_SIZE = min(max(DB_POOL_SIZE, MIN_DB_POOL_SIZE), MAX_DB_POOL_SIZE)
 
-# Pydantic Models
-class Transaction(BaseModel):
-    id: str
-    date: str
-    category: str
-    type: str
-    amount: float
+# Seconds a request waits for a free pooled connection before giving up
+# with 503; the pool itself fails straight away when it is exhausted
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))
+
+# Run the CREATE TABLE migrations in each worker on startup
+DB_RUN_MIGRATIONS = os.getenv("DB_RUN_MIGRATIONS") == "1"
+
+# Tables created by init_database()
+APP_TABLES = ("Transactions", "budgets", "categories")
+
+# Rows per multi-row INSERT statement; keeps each statement
+# well below MySQL's max_allowed_packet. Capped so a batch of the widest
+# rows (9 Transactions columns) stays within the 65535 placeholder
+# limit of prepared statements
+MAX_BACKUP_BATCH_SIZE = 65535 // 9
+BACKUP_BATCH_SIZE = int(os.getenv("BACKUP_BATCH_SIZE", "1000"))
+if not 1 <= BACKUP_BATCH_SIZE <= MAX_BACKUP_BATCH_SIZE:
+    logger.warning(f"BACKUP_BATCH_SIZE={BACKUP_BATCH_SIZE} is out of range, "
+                   f"clamping to 1..{MAX_BACKUP_BATCH_SIZE}")
+    BACKUP_BATCH_SIZE = min(max(BACKUP_BATCH_SIZE, 1), MAX_BACKUP_BATCH_SIZE)
+
+# Once a backup passes this many transactions, the rest are bulk loaded
+# with LOAD DATA LOCAL INFILE instead of multi-row INSERTs
+LOAD_DATA_THRESHOLD = int(os.getenv("BACKUP_LOAD_DATA_THRESHOLD", "5000"))
+
+# Backup bodies up to this many bytes are read into memory and decoded in
+# one pass; larger ones (or ones without a Content-Length) are spooled to
+# disk as they arrive and decoded a batch at a time
+BACKUP_SPOOL_THRESHOLD = int(os.getenv("BACKUP_SPOOL_THRESHOLD", str(8 * 1024 * 1024)))
+
+# Transactions upsert, shared by the batched inserts and the
+# LOAD DATA staging table merge
+TRANSACTION_COLUMNS = (
+    "id, date, category, type, amount, description, created_at, updated_at, synced"
+)
+TRANSACTION_UPSERT = '''
+    ON DUPLICATE KEY UPDATE
+    date = VALUES(date), category = VALUES(category), type = VALUES(type),
+    amount = VALUES(amount), description = VALUES(description),
+    created_at = VALUES(created_at), updated_at = VALUES(updated_at),
+    synced = VALUES(synced)
+'''
+
+# Seconds a successful /health database check is cached
+HEALTH_CHECK_TTL = float(os.getenv("HEALTH_CHECK_TTL", "5"))
+
+# Rows fetched per round trip by /restore, also the size of each chunk
+# written to the response stream
+RESTORE_FETCH_SIZE = int(os.getenv("RESTORE_FETCH_SIZE", "1000"))
+
+# Tables returned by /restore, in response order
+# DECIMAL columns are cast to DOUBLE so the driver returns floats instead
+# of building a Decimal per row (CAST AS DOUBLE needs MySQL 8.0.17+)
+RESTORE_QUERIES = (
+    ("transactions", '''
+        SELECT id, date, category, type, CAST(amount AS DOUBLE) AS amount,
+        description, created_at, updated_at, synced
+        FROM Transactions ORDER BY date DESC
+    '''),
+    ("budgets", '''
+        SELECT id, category, CAST(monthly_limit AS DOUBLE) AS monthly_limit,
+        created_at, updated_at
+        FROM budgets
+    '''),
+    ("categories", "SELECT id, name, type, icon, created_at FROM categories"),
+)
+
+
+# Backup payload models
+# Validated with msgspec rather than Pydantic: backups can carry thousands
+# of rows and msgspec converts them in C. Rows only hold scalars, so they
+# are frozen and left untracked by the garbage collector (gc=False),
+# which makes each instance smaller and keeps large backups from
+# triggering GC passes
+# Fields are bounded like their columns in init_database(), so an
+# oversized value fails validation on both backup write paths rather
+# than being cut short by LOAD DATA
+RowId = Annotated[str, msgspec.Meta(max_length=36)]
+Name = Annotated[str, msgspec.Meta(max_length=100)]
+Kind = Annotated[str, msgspec.Meta(max_length=10)]
+Icon = Annotated[str, msgspec.Meta(max_length=50)]
+Timestamp = Annotated[str, msgspec.Meta(max_length=20)]
+# DECIMAL(10, 2)
+Amount = Annotated[float, msgspec.Meta(ge=-99999999.99, le=99999999.99)]
+
+
+class Transaction(msgspec.Struct, kw_only=True, frozen=True, gc=False):
+    id: RowId
+    date: datetime.date
+    category: Name
+    type: Kind
+    amount: Amount
     description: Optional[str] = ""
-    created_at: str
-    updated_at: str
-    synced: int = 1
+    created_at: Timestamp
+    updated_at: Timestamp
+    # Pydantic's lax int accepted JSON booleans; msgspec only does so for
+    # an explicit bool member, which the drivers send as 1/0
+    synced: Union[int, bool] = 1
 
 
-class Budget(BaseModel):
-    id: str
-    category: str
-    monthly_limit: float
-    created_at: str
-    updated_at: str
+class Budget(msgspec.Struct, kw_only=True, frozen=True, gc=False):
+    id: RowId
+    category: Name
+    monthly_limit: Amount
+    created_at: Timestamp
+    updated_at: Timestamp
 
 
-class Category(BaseModel):
-    id: str
-    name: str
-    type: str
-    created_at: str
-    icon: Optional[str] = None
+class Category(msgspec.Struct, kw_only=True, frozen=True, gc=False):
+    id: RowId
+    name: Name
+    type: Kind
+    created_at: Timestamp
+    icon: Optional[Icon] = None
 
 
-class BackupData(BaseModel):
+class BackupData(msgspec.Struct):
     transactions: List[Transaction]
     budgets: List[Budget]
     categories: List[Category]
 
 
+def _inline_json_schema(schema):
+    """
+    Replace the $defs references in a msgspec JSON schema with the
+    definitions themselves, so it can be embedded in the OpenAPI document
+    """
+    defs = schema.pop("$defs", {})
+    
+    def resolve(node):
+        if isinstance(node, dict):
+            if "$ref" in node:
+                return resolve(defs[node["$ref"].rsplit("/", 1)[-1]])
+            return {key: resolve(value) for key, value in node.items()}
+        if isinstance(node, list):
+            return [resolve(value) for value in node]
+        return node
+    
+    return resolve(schema)
+
+
+# /backup reads its body directly, so FastAPI cannot derive this for /docs
+BACKUP_REQUEST_BODY = {
+    "required": True,
+    "content": {
+        "application/json": {"schema": _inline_json_schema(msgspec.json.schema(BackupData))}
+    }
+}
+
+
+class _SpooledBackupData(msgspec.Struct):
+    """Same shape as BackupData, with each row left as undecoded JSON"""
+    transactions: List[msgspec.Raw]
+    budgets: List[msgspec.Raw]
+    categories: List[msgspec.Raw]
+
+
+# Row model, multi-row upsert and row placeholder for each section of a
+# backup payload; upsert columns follow the model's field order
+BACKUP_SECTIONS = {
+    "transactions": (Transaction, f'''
+        INSERT INTO Transactions 
+        ({TRANSACTION_COLUMNS})
+        VALUES {{values}}
+        {TRANSACTION_UPSERT}
+    ''', "(%s, %s, %s, %s, %s, %s, %s, %s, %s)"),
+    # REPLACE, not an upsert: budgets has two unique keys (id and
+    # category), and a row matching one existing row on id and another
+    # on category must replace both, which ON DUPLICATE KEY UPDATE cannot
+    "budgets": (Budget, '''
+        REPLACE INTO budgets 
+        (id, category, monthly_limit, created_at, updated_at)
+        VALUES {values}
+    ''', "(%s, %s, %s, %s, %s)"),
+    "categories": (Category, '''
+        INSERT INTO categories 
+        (id, name, type, created_at, icon)
+        VALUES {values}
+        ON DUPLICATE KEY UPDATE
+        icon = VALUES(icon)
+    ''', "(%s, %s, %s, %s, %s)"),
+}
+
+
+# Pydantic Models
 class RestoreResponse(BaseModel):
     transactions: List[Dict[str, Any]]
     budgets: List[Dict[str, Any]]
@@ -89,8 +269,9 @@ class RestoreResponse(BaseModel):
 
 
 # Database Functions
-def get_db_connection():
-    """Create and return MySQL database connection"""
+def init_connection_pool(pool_size=None):
+    """Create the MySQL connection pool shared by all requests"""
+    pool_size = pool_size or DB_POOL_SIZE
     try:
         # Validate required environment variables
         required_vars = ["DB_HOST", "DB_USER", "DB_PASSWORD", "DB_NAME"]
@@ -99,10 +280,13 @@ def get_db_connection():
         if missing_vars:
             raise ValueError(f"Missing required environment variables: {', '.join(missing_vars)}")
         
-        connection = mysql.connector.connect(**DB_CONFIG)
-        if connection.is_connected():
-            logger.info("Successfully connected to MySQL database")
-            return connection
+        os.makedirs(BACKUP_STAGING_DIR, exist_ok=True)
+        app.state.pool = pooling.MySQLConnectionPool(
+            pool_name="pfm",
+            pool_size=pool_size,
+            **DB_CONFIG
+        )
+        logger.info(f"MySQL connection pool created with {pool_size} connections")
     except Error as e:
         logger.error(f"Error connecting to MySQL: {e}")
         raise HTTPException(status_code=500, detail=f"Database connection failed: {str(e)}")
@@ -111,6 +295,300 @@ def get_db_connection():
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def get_db_connection():
+    """
+    Borrow a MySQL connection from the pool, waiting up to
+    DB_POOL_TIMEOUT seconds for one to be returned if it is exhausted
+    Calling close() on it returns it to the pool
+    Runs in a worker thread, so the wait does not block the event loop
+    """
+    deadline = time.monotonic() + DB_POOL_TIMEOUT
+    try:
+        while True:
+            try:
+                connection = app.state.pool.get_connection()
+                break
+            except PoolError:
+                if time.monotonic() >= deadline:
+                    logger.warning("Timed out waiting for a pooled MySQL connection")
+                    raise HTTPException(status_code=503, detail="Database busy, try again later")
+                time.sleep(0.05)
+    except Error as e:
+        logger.error(f"Error getting connection from pool: {e}")
+        raise HTTPException(status_code=500, detail=f"Database connection failed: {str(e)}")
+    
+    try:
+        # Pooled connections can go stale while idle; reconnect if needed
+        connection.ping(reconnect=True, attempts=2)
+        return connection
+    except Error as e:
+        connection.close()
+        logger.error(f"Error connecting to MySQL: {e}")
+        raise HTTPException(status_code=500, detail=f"Database connection failed: {str(e)}")
+
+
+def _execute_batched(cursor, statement, row_placeholder, rows):
+    """
+    Execute a multi-row INSERT statement in chunks of
+    BACKUP_BATCH_SIZE rows, one round trip per chunk.
+    The statement must contain a {values} placeholder for the
+    VALUES list.
+    """
+    iterator = iter(rows)
+    while batch := list(islice(iterator, BACKUP_BATCH_SIZE)):
+        params = [value for row in batch for value in row]
+        cursor.execute(_batch_statement(statement, row_placeholder, len(batch)), params)
+
+
+@lru_cache(maxsize=32)
+def _batch_statement(statement, row_placeholder, row_count):
+    """
+    Build the SQL for a batch of row_count rows
+    Cached so every full batch reuses the same string object, which
+    lets a prepared cursor skip re-preparing the statement
+    """
+    return statement.format(values=", ".join([row_placeholder] * row_count))
+
+
+def check_database():
+    """
+    Warn about missing tables without running any DDL
+    Used at startup when migrations are run out of band
+    """
+    connection = get_db_connection()
+    cursor = connection.cursor()
+    
+    try:
+        cursor.execute(
+            "SELECT LOWER(TABLE_NAME) FROM information_schema.TABLES "
+            "WHERE TABLE_SCHEMA = DATABASE()"
+        )
+        existing = {row[0] for row in cursor.fetchall()}
+        missing = [table for table in APP_TABLES if table.lower() not in existing]
+        
+        if missing:
+            logger.warning(f"Missing database tables: {', '.join(missing)}. "
+                           f"Run 'python -m migrate' or set DB_RUN_MIGRATIONS=1")
+        
+    except Error as e:
+        logger.error(f"Error checking database tables: {e}")
+    finally:
+        cursor.close()
+        connection.close()
+
+
+class _BackupWriter:
+    """
+    Writes decoded backup rows to MySQL in BACKUP_BATCH_SIZE batches,
+    all within one transaction
+    Every method blocks and must run in the threadpool
+    """
+    
+    def __init__(self):
+        # Borrowed on the first write, so a slow upload or a body that
+        # fails validation never holds a pooled connection
+        self.connection = None
+        self.cursors = {}
+        self.pending = {section: [] for section in BACKUP_SECTIONS}
+        self.counts = dict.fromkeys(BACKUP_SECTIONS, 0)
+        self.staging_file = None
+        self.staging_checked = False
+        self.committed = False
+    
+    def add(self, section, rows):
+        """Queue decoded rows, writing out every full batch"""
+        self.pending[section].extend(msgspec.structs.astuple(row) for row in rows)
+        self.counts[section] += len(rows)
+        if len(self.pending[section]) >= BACKUP_BATCH_SIZE:
+            self.flush()
+    
+    def flush(self, final=False):
+        """Write queued rows, holding back a partial batch unless final"""
+        for section, rows in self.pending.items():
+            ready = len(rows) if final else len(rows) - len(rows) % BACKUP_BATCH_SIZE
+            if ready:
+                self.pending[section] = rows[ready:]
+                self._write(section, rows[:ready])
+    
+    def commit(self):
+        """Write the remaining rows and commit; returns the row counts"""
+        self.flush(final=True)
+        if self.connection is not None:
+            if self.staging_file is not None:
+                self._merge_staged_transactions()
+            self.connection.commit()
+        self.committed = True
+        return self.counts
+    
+    def close(self):
+        """Roll back unless committed and return the connection to the pool"""
+        if self.connection is None:
+            return
+        try:
+            if not self.committed:
+                self.connection.rollback()
+        finally:
+            if self.staging_file is not None:
+                self.staging_file.close()
+                os.remove(self.staging_file.name)
+            _release_connection(self.connection, *self.cursors.values())
+    
+    def _begin(self):
+        """Borrow a connection and start the backup transaction"""
+        self.connection = get_db_connection()
+        # Server-side prepared statements: each batch statement is parsed
+        # once and later batches of the same size only send parameters.
+        # One cursor per section, so a flush that interleaves sections
+        # does not re-prepare another section's statement
+        self.cursors = {
+            section: self.connection.cursor(prepared=True) for section in BACKUP_SECTIONS
+        }
+        # One explicit transaction for all three tables, so the whole
+        # backup costs a single redo log flush on commit and is applied
+        # all-or-nothing
+        self.connection.start_transaction()
+    
+    def _write(self, section, rows):
+        if self.connection is None:
+            self._begin()
+        if section == "transactions" and self._staging_transactions():
+            for row in rows:
+                self.staging_file.write("\t".join(_infile_field(value) for value in row) + "\n")
+        else:
+            _, statement, row_placeholder = BACKUP_SECTIONS[section]
+            _execute_batched(self.cursors[section], statement, row_placeholder, rows)
+    
+    def _staging_transactions(self):
+        """
+        Whether transaction rows go to the LOAD DATA staging file
+        Switches over once a backup passes LOAD_DATA_THRESHOLD, if the
+        server allows LOCAL INFILE
+        """
+        if not self.staging_checked and self.counts["transactions"] > LOAD_DATA_THRESHOLD:
+            self.staging_checked = True
+            cursor = self.connection.cursor()
+            try:
+                cursor.execute("SELECT @@GLOBAL.local_infile")
+                (enabled,) = cursor.fetchone()
+            finally:
+                cursor.close()
+            
+            if enabled:
+                self.staging_file = tempfile.NamedTemporaryFile(
+                    "w", encoding="utf-8", newline="", suffix=".tsv",
+                    dir=BACKUP_STAGING_DIR, delete=False
+                )
+            else:
+                logger.warning("LOAD DATA LOCAL INFILE is disabled on the server")
+        return self.staging_file is not None
+    
+    def _merge_staged_transactions(self):
+        """
+        Load the staging file into a temporary table, then merge it into
+        Transactions with a single INSERT ... SELECT
+        """
+        self.staging_file.flush()
+        cursor = self.connection.cursor()
+        
+        try:
+            cursor.execute("CREATE TEMPORARY TABLE tx_stage LIKE Transactions")
+            # REPLACE so a repeated id keeps its last row, as the batched
+            # upsert would
+            cursor.execute(f'''
+                LOAD DATA LOCAL INFILE '{self.staging_file.name}'
+                REPLACE INTO TABLE tx_stage
+                CHARACTER SET utf8mb4
+                ({TRANSACTION_COLUMNS})
+            ''')
+            self._check_load_warnings(cursor)
+            cursor.execute(f'''
+                INSERT INTO Transactions ({TRANSACTION_COLUMNS})
+                SELECT {TRANSACTION_COLUMNS} FROM tx_stage
+                {TRANSACTION_UPSERT}
+            ''')
+            # On errors the pool's session reset drops the staging table
+            cursor.execute("DROP TEMPORARY TABLE tx_stage")
+        finally:
+            cursor.close()
+    
+    @staticmethod
+    def _check_load_warnings(cursor):
+        """
+        Raise, rolling the backup back, if LOAD DATA cut short or clamped
+        any value; LOCAL loads turn those errors into warnings even in
+        strict mode. Notes (e.g. amounts rounded to cents) are allowed,
+        as they are for the batched inserts
+        """
+        if not cursor.warning_count:
+            return
+        cursor.execute("SHOW WARNINGS")
+        for level, code, message in cursor.fetchall():
+            if level != "Note":
+                raise DataError(msg=f"Staged transactions rejected: {message}", errno=code)
+
+
+def _decode_backup(data, type, section=None, offset=0):
+    """
+    Decode and validate backup JSON, raising 400 or 422
+    For a batch of one section's rows, section and offset point error
+    paths at the row within the whole backup
+    """
+    try:
+        # strict=False keeps most of Pydantic's lax coercion, such as
+        # "12.50" -> 12.5 and "2024-01-31" -> date; bools are only
+        # accepted where a field allows them (see Transaction.synced)
+        return msgspec.json.decode(data, type=type, strict=False)
+    except msgspec.ValidationError as e:
+        detail = str(e)
+        if section is not None:
+            detail = re.sub(
+                r"`\$\[(\d+)\]",
+                lambda match: f"`$.{section}[{offset + int(match.group(1))}]",
+                detail
+            )
+        raise HTTPException(status_code=422, detail=f"Invalid backup data: {detail}")
+    except msgspec.DecodeError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid JSON: {str(e)}")
+
+
+def _write_backup(writer, body):
+    """Decode a backup body held in memory and write it (blocking)"""
+    data = _decode_backup(body, BackupData)
+    for section in BACKUP_SECTIONS:
+        writer.add(section, getattr(data, section))
+    return writer.commit()
+
+
+def _write_spooled_backup(writer, spool):
+    """
+    Decode a backup body spooled to disk and write it (blocking)
+    The file is memory mapped and only split into per-row JSON up front;
+    rows are decoded into structs one batch at a time
+    """
+    size = os.fstat(spool.fileno()).st_size
+    # Not closed explicitly: the Raw rows point into the mapping, which
+    # is unmapped once the last of them is freed
+    body = mmap.mmap(spool.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+    data = _decode_backup(body, _SpooledBackupData)
+    
+    for section, (model, _, _) in BACKUP_SECTIONS.items():
+        raws = getattr(data, section)
+        for offset in range(0, len(raws), BACKUP_BATCH_SIZE):
+            batch = b"[" + b",".join(raws[offset:offset + BACKUP_BATCH_SIZE]) + b"]"
+            writer.add(section, _decode_backup(batch, List[model], section, offset))
+    return writer.commit()
+
+
+def _infile_field(value):
+    """Escape a value for LOAD DATA's default tab separated format"""
+    if value is None:
+        return "\\N"
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    return (str(value).replace("\\", "\\\\")
+            .replace("\t", "\\t").replace("\n", "\\n"))
+
+
 def init_database():
     """Initialize database tables if they don't exist"""
     connection = get_db_connection()
@@ -121,7 +599,7 @@ def init_database():
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS Transactions (
                 id VARCHAR(36) PRIMARY KEY,
-                date VARCHAR(10) NOT NULL,
+                date DATE NOT NULL,
                 category VARCHAR(100) NOT NULL,
                 type VARCHAR(10) NOT NULL,
                 amount DECIMAL(10, 2) NOT NULL,
@@ -129,12 +607,28 @@ def init_database():
                 created_at VARCHAR(20) NOT NULL,
                 updated_at VARCHAR(20) NOT NULL,
                 synced INT DEFAULT 1,
-                INDEX idx_date (date),
+                INDEX idx_date (date DESC),
                 INDEX idx_type (type),
                 INDEX idx_category (category)
             )
         ''')
         
+        # Tables created before dates were stored as DATE
+        cursor.execute('''
+            SELECT DATA_TYPE FROM information_schema.COLUMNS
+            WHERE TABLE_SCHEMA = DATABASE()
+            AND LOWER(TABLE_NAME) = 'transactions' AND COLUMN_NAME = 'date'
+        ''')
+        (date_type,) = cursor.fetchone()
+        if date_type.lower() != "date":
+            logger.info("Migrating Transactions.date to DATE")
+            cursor.execute('''
+                ALTER TABLE Transactions
+                MODIFY date DATE NOT NULL,
+                DROP INDEX idx_date,
+                ADD INDEX idx_date (date DESC)
+            ''')
+        
         # Budgets table
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS budgets (
@@ -171,9 +665,16 @@ def init_database():
 # API Endpoints
 @app.on_event("startup")
 async def startup_event():
-    """Initialize database on startup"""
+    """Create the connection pool and check the database on startup"""
     logger.info("Starting Personal Finance Manager API...")
-    init_database()
+    init_connection_pool()
+    app.state.last_health_ok_ts = float("-inf")
+    # Schema DDL normally runs once per deploy via "python -m migrate"
+    # rather than in every worker process
+    if DB_RUN_MIGRATIONS:
+        init_database()
+    else:
+        check_database()
     logger.info("API ready to accept requests")
 
 
@@ -192,72 +693,51 @@ async def root():
     }
 
 
-@app.post("/backup")
-async def backup(data: BackupData):
+@app.post("/backup", openapi_extra={"requestBody": BACKUP_REQUEST_BODY})
+async def backup(request: Request):
     """
     Backup data to MySQL database
     Accepts transactions, budgets, and categories
-    Uses REPLACE INTO for upsert behavior
+    Upserts transactions with INSERT ... ON DUPLICATE KEY UPDATE and
+    budgets with REPLACE INTO
+    Bodies above BACKUP_SPOOL_THRESHOLD are spooled to disk as they
+    arrive and decoded a batch at a time, so memory use is bounded by the
+    batch size rather than the payload size
     """
-    connection = get_db_connection()
-    cursor = connection.cursor()
+    # Decoding and the blocking mysql-connector calls run in the
+    # threadpool to keep the event loop free for other requests
+    writer = _BackupWriter()
+    length = request.headers.get("content-length", "")
     
     try:
-        # Backup transactions
-        for trans in data.transactions:
-            cursor.execute('''
-                REPLACE INTO Transactions 
-                (id, date, category, type, amount, description, created_at, updated_at, synced)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-            ''', (
-                trans.id, trans.date, trans.category, trans.type,
-                trans.amount, trans.description, trans.created_at,
-                trans.updated_at, trans.synced
-            ))
+        if length.isdigit() and int(length) <= BACKUP_SPOOL_THRESHOLD:
+            counts = await run_in_threadpool(_write_backup, writer, await request.body())
+        else:
+            with tempfile.TemporaryFile(dir=BACKUP_STAGING_DIR) as spool:
+                async for chunk in request.stream():
+                    await run_in_threadpool(spool.write, chunk)
+                spool.flush()
+                counts = await run_in_threadpool(_write_spooled_backup, writer, spool)
         
-        # Backup budgets
-        for budget in data.budgets:
-            cursor.execute('''
-                REPLACE INTO budgets 
-                (id, category, monthly_limit, created_at, updated_at)
-                VALUES (%s, %s, %s, %s, %s)
-            ''', (
-                budget.id, budget.category, budget.monthly_limit,
-                budget.created_at, budget.updated_at
-            ))
-        
-        # Backup categories
-        for cat in data.categories:
-            cursor.execute('''
-                INSERT INTO categories 
-                (id, name, type, icon, created_at)
-                VALUES (%s, %s, %s, %s, %s)
-                ON DUPLICATE KEY UPDATE
-                icon = VALUES(icon)
-            ''', (
-                cat.id, cat.name, cat.type, cat.icon, cat.created_at
-            ))
-        
-        connection.commit()
-        
-        logger.info(f"Backup successful: {len(data.transactions)} transactions, "
-                   f"{len(data.budgets)} budgets, {len(data.categories)} categories")
+        logger.info(f"Backup successful: {counts['transactions']} transactions, "
+                   f"{counts['budgets']} budgets, {counts['categories']} categories")
         
         return {
             "status": "success",
             "message": "Backup completed successfully",
-            "transactions_backed_up": len(data.transactions),
-            "budgets_backed_up": len(data.budgets),
-            "categories_backed_up": len(data.categories)
+            "transactions_backed_up": counts["transactions"],
+            "budgets_backed_up": counts["budgets"],
+            "categories_backed_up": counts["categories"]
         }
         
     except Error as e:
-        connection.rollback()
         logger.error(f"Backup error: {e}")
         raise HTTPException(status_code=500, detail=f"Backup failed: {str(e)}")
     finally:
-        cursor.close()
-        connection.close()
+        # Rolls back anything uncommitted; shielded so a client
+        # disconnect cannot leak the pooled connection
+        with anyio.CancelScope(shield=True):
+            await run_in_threadpool(writer.close)
 
 
 @app.get("/restore", response_model=RestoreResponse)
@@ -265,46 +745,180 @@ async def restore():
     """
     Restore all data from MySQL database
     Returns transactions, budgets, and categories
+    The three queries run concurrently on separate pooled connections,
+    then the JSON body is streamed as transaction rows are read
+    Each connection reads its own snapshot, so unlike a single
+    REPEATABLE READ transaction, a restore that overlaps a backup can
+    return some tables from before it committed and others from after
+    RestoreResponse only documents the schema; rows are encoded with
+    orjson directly and never re-validated through Pydantic
+    """
+    (transactions_query, *other_queries) = RESTORE_QUERIES
+    
+    # All queries finish before streaming starts so that database errors
+    # can still be reported with a proper status code. Shielded so every
+    # borrowed connection is accounted for even if the client goes away
+    with anyio.CancelScope(shield=True):
+        results = await asyncio.gather(
+            run_in_threadpool(_open_restore_cursor, transactions_query[1]),
+            *(run_in_threadpool(_fetch_restore_rows, query) for _, query in other_queries),
+            return_exceptions=True
+        )
+    
+    errors = [result for result in results if isinstance(result, BaseException)]
+    if errors:
+        if not isinstance(results[0], BaseException):
+            await results[0].release()
+        if isinstance(errors[0], Error):
+            logger.error(f"Restore error: {errors[0]}")
+            raise HTTPException(status_code=500, detail=f"Restore failed: {str(errors[0])}")
+        raise errors[0]
+    
+    lease, *prefetched = results
+    return _LeasedStreamingResponse(
+        _stream_restore(lease, prefetched),
+        lease,
+        media_type="application/json"
+    )
+
+
+class _ConnectionLease:
+    """A pooled connection and its cursor, returned to the pool at most once"""
+    
+    def __init__(self, connection, cursor):
+        self.connection = connection
+        self.cursor = cursor
+        self.released = False
+    
+    async def release(self):
+        """Release the connection; later calls are no-ops"""
+        if not self.released:
+            self.released = True
+            # Shielded so a client disconnect cannot leak the pooled connection
+            with anyio.CancelScope(shield=True):
+                await run_in_threadpool(_release_connection, self.connection, self.cursor)
+
+
+class _LeasedStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse that releases its connection lease once sent
+    The body generator also releases it, but never runs at all if the
+    client disconnects or sending fails before iteration starts
+    """
+    
+    def __init__(self, content, lease, **kwargs):
+        super().__init__(content, **kwargs)
+        self.lease = lease
+    
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            await self.lease.release()
+
+
+def _open_restore_cursor(query):
+    """
+    Run the transactions query on its own connection (blocking)
+    Returns a lease on the connection and an unbuffered cursor positioned
+    on the result, so rows are read off the socket batch by batch while
+    streaming
     """
     connection = get_db_connection()
+    cursor = connection.cursor(dictionary=True, buffered=False)
+    cursor.arraysize = RESTORE_FETCH_SIZE
+    
+    try:
+        cursor.execute(query)
+        return _ConnectionLease(connection, cursor)
+    except BaseException:
+        _release_connection(connection, cursor)
+        raise
+
+
+def _fetch_restore_rows(query):
+    """Fetch a small table on its own pooled connection (blocking)"""
+    connection = get_db_connection()
     cursor = connection.cursor(dictionary=True)
     
     try:
-        # Fetch transactions
-        cursor.execute("SELECT * FROM Transactions ORDER BY date DESC")
-        transactions = cursor.fetchall()
-        
-        # Fetch budgets
-        cursor.execute("SELECT * FROM budgets")
-        budgets = cursor.fetchall()
-        
-        # Fetch categories
-        cursor.execute("SELECT * FROM categories")
-        categories = cursor.fetchall()
+        cursor.execute(query)
+        return cursor.fetchall()
+    finally:
+        _release_connection(connection, cursor)
+
+
+async def _stream_restore(lease, prefetched):
+    """
+    Yield the restore payload as JSON chunks
+    Transactions are read from the already executed cursor; the other
+    tables arrive fully fetched, in RESTORE_QUERIES order
+    """
+    counts = {}
+    
+    try:
+        table = RESTORE_QUERIES[0][0]
+        yield f'{{"{table}":['.encode()
+        counts[table] = 0
+        separator = b""
+        while rows := await run_in_threadpool(lease.cursor.fetchmany, RESTORE_FETCH_SIZE):
+            yield separator + _encode_rows(rows)
+            separator = b","
+            counts[table] += len(rows)
         
-        logger.info(f"Restore successful: {len(transactions)} transactions, "
-                   f"{len(budgets)} budgets, {len(categories)} categories")
+        for (table, _), rows in zip(RESTORE_QUERIES[1:], prefetched):
+            yield f'],"{table}":['.encode() + _encode_rows(rows)
+            counts[table] = len(rows)
+        yield b"]}"
         
-        return {
-            "transactions": transactions,
-            "budgets": budgets,
-            "categories": categories
-        }
+        logger.info(f"Restore successful: {counts['transactions']} transactions, "
+                   f"{counts['budgets']} budgets, {counts['categories']} categories")
         
     except Error as e:
+        # Headers are already sent, so the only option left is to abort
         logger.error(f"Restore error: {e}")
-        raise HTTPException(status_code=500, detail=f"Restore failed: {str(e)}")
+        raise
+    finally:
+        await lease.release()
+
+
+def _encode_rows(rows):
+    """Encode rows as comma separated JSON objects"""
+    return b",".join(orjson.dumps(row) for row in rows)
+
+
+def _release_connection(connection, *cursors):
+    """Close the cursors and return the connection to the pool (blocking)"""
+    try:
+        # An aborted restore leaves rows unread on the connection, which
+        # would otherwise break it for the next request
+        if connection.unread_result:
+            connection.consume_results()
+        for cursor in cursors:
+            cursor.close()
     finally:
-        cursor.close()
         connection.close()
 
 
 @app.get("/health")
 async def health_check():
-    """Health check endpoint"""
+    """
+    Health check endpoint
+    A successful database check is reused for HEALTH_CHECK_TTL seconds
+    so frequent load balancer probes do not each hit MySQL
+    """
     try:
-        connection = get_db_connection()
-        connection.close()
+        now = time.monotonic()
+        if now - app.state.last_health_ok_ts > HEALTH_CHECK_TTL:
+            if not await run_in_threadpool(_ping_database):
+                # Every pooled connection is serving a request, so the
+                # database is reachable; report busy rather than down
+                return {
+                    "status": "healthy",
+                    "database": "busy",
+                    "message": "API is running and all database connections are in use"
+                }
+            app.state.last_health_ok_ts = now
         return {
             "status": "healthy",
             "database": "connected",
@@ -319,6 +933,24 @@ async def health_check():
         }
 
 
+def _ping_database():
+    """
+    Ping MySQL on a pooled connection (blocking)
+    Unlike get_db_connection() it never waits: returns False straight
+    away if the pool is exhausted, so probes answer quickly under load
+    """
+    try:
+        connection = app.state.pool.get_connection()
+    except PoolError:
+        return False
+    
+    try:
+        connection.ping(reconnect=True, attempts=2)
+    finally:
+        connection.close()
+    return True
+
+
 if __name__ == "__main__":
     import uvicorn
     
@@ -0,0 +1,28 @@
+"""
+Database migrations for Personal Finance Manager API
+Creates the MySQL tables once per deploy, outside the web workers
+
+Usage:
+    python -m migrate
+"""
+import sys
+
+from fastapi import HTTPException
+
+from main import init_connection_pool, init_database, logger
+
+
+def main():
+    """Run the migrations and return the process exit code"""
+    try:
+        # A single connection is all the migrations need
+        init_connection_pool(pool_size=1)
+        init_database()
+    except HTTPException as e:
+        logger.error(f"Migration failed: {e.detail}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
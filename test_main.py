@@ -0,0 +1,614 @@
+"""
+Unit tests for the backup/restore helpers in main.py
+They use fakes in place of MySQL: python -m pytest -q
+"""
+import asyncio
+import datetime
+import json
+import tempfile
+from typing import List
+
+import msgspec
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+import main
+
+
+class FakeCursor:
+    local_infile = 1
+
+    def __init__(self, rows=()):
+        self.rows = list(rows)
+        self.executed = []
+        self.warning_count = 0
+        self.closed = False
+
+    def execute(self, statement, params=None):
+        statement = " ".join(statement.split())
+        if statement == "SELECT @@GLOBAL.local_infile":
+            self.rows = [(self.local_infile,)]
+        self.executed.append((statement, params))
+
+    def fetchone(self):
+        return self.rows.pop(0)
+
+    def fetchall(self):
+        rows, self.rows = self.rows, []
+        return rows
+
+    def fetchmany(self, size):
+        batch, self.rows = self.rows[:size], self.rows[size:]
+        return batch
+
+    def close(self):
+        self.closed = True
+
+
+class FakeConnection:
+    unread_result = False
+
+    def __init__(self):
+        self.cursors = []
+        self.events = []
+        self.closed = False
+
+    def cursor(self, **kwargs):
+        cursor = FakeCursor()
+        self.cursors.append(cursor)
+        return cursor
+
+    def ping(self, **kwargs):
+        self.events.append("ping")
+
+    def start_transaction(self):
+        self.events.append("start")
+
+    def commit(self):
+        self.events.append("commit")
+
+    def rollback(self):
+        self.events.append("rollback")
+
+    def close(self):
+        self.closed = True
+
+    @property
+    def executed(self):
+        return [statement for cursor in self.cursors for statement, _ in cursor.executed]
+
+
+@pytest.fixture
+def connections(monkeypatch):
+    """Connections handed out by get_db_connection, in borrow order"""
+    borrowed = []
+
+    def get_db_connection():
+        borrowed.append(FakeConnection())
+        return borrowed[-1]
+
+    monkeypatch.setattr(main, "get_db_connection", get_db_connection)
+    return borrowed
+
+
+def _transaction(index, **fields):
+    return {
+        "id": f"t{index}", "date": "2024-01-31", "category": "Food",
+        "type": "expense", "amount": 12.5, "description": "Lunch",
+        "created_at": "2024-01-31 12:00", "updated_at": "2024-01-31 12:00",
+        **fields
+    }
+
+
+def _payload(transactions=3, **sections):
+    return {
+        "transactions": [_transaction(i) for i in range(transactions)],
+        "budgets": [{"id": "b1", "category": "Food", "monthly_limit": 300,
+                     "created_at": "c", "updated_at": "u"}],
+        "categories": [],
+        **sections
+    }
+
+
+def _write(body, spooled):
+    """Write a backup body through either decode path"""
+    writer = main._BackupWriter()
+    if not spooled:
+        return writer, main._write_backup(writer, body)
+    with tempfile.TemporaryFile() as spool:
+        spool.write(body)
+        spool.flush()
+        return writer, main._write_spooled_backup(writer, spool)
+
+
+# Decoding
+
+@pytest.mark.parametrize("spooled", [False, True])
+def test_write_backup_counts_rows(connections, monkeypatch, spooled):
+    monkeypatch.setattr(main, "BACKUP_BATCH_SIZE", 2)
+    body = json.dumps(_payload(5, version={"nested": [1, 2]})).encode()
+
+    _, counts = _write(body, spooled)
+
+    assert counts == {"transactions": 5, "budgets": 1, "categories": 0}
+    (connection,) = connections
+    assert connection.events == ["start", "commit"]
+    transaction_batches = [
+        params for cursor in connection.cursors for statement, params in cursor.executed
+        if statement.startswith("INSERT INTO Transactions")
+    ]
+    assert [len(params) // 9 for params in transaction_batches] == [2, 2, 1]
+
+
+@pytest.mark.parametrize("spooled", [False, True])
+def test_write_backup_truncated_body(connections, spooled):
+    body = json.dumps(_payload()).encode()
+
+    with pytest.raises(HTTPException) as error:
+        _write(body[:-10], spooled)
+    assert error.value.status_code == 400
+    assert not connections
+
+
+@pytest.mark.parametrize("spooled", [False, True])
+@pytest.mark.parametrize("body, detail", [
+    ({"transactions": "oops", "budgets": [], "categories": []},
+     "Expected `array`, got `str` - at `$.transactions`"),
+    ({"data": []}, "Object missing required field `transactions`"),
+    ([], "Expected `object`, got `array`"),
+])
+def test_write_backup_rejects_bad_shape(connections, spooled, body, detail):
+    with pytest.raises(HTTPException) as error:
+        _write(json.dumps(body).encode(), spooled)
+    assert error.value.status_code == 422
+    assert error.value.detail == f"Invalid backup data: {detail}"
+    assert not connections
+
+
+@pytest.mark.parametrize("spooled", [False, True])
+def test_write_backup_error_path_within_section(connections, monkeypatch, spooled):
+    monkeypatch.setattr(main, "BACKUP_BATCH_SIZE", 3)
+    payload = _payload(5)
+    payload["transactions"][4]["amount"] = "x"
+
+    with pytest.raises(HTTPException) as error:
+        _write(json.dumps(payload).encode(), spooled)
+    assert error.value.status_code == 422
+    assert error.value.detail.endswith("- at `$.transactions[4].amount`")
+
+
+@pytest.mark.parametrize("threshold", [0, main.BACKUP_SPOOL_THRESHOLD])
+@pytest.mark.parametrize("chunked", [False, True])
+def test_backup_endpoint_paths(connections, monkeypatch, threshold, chunked):
+    monkeypatch.setattr(main, "BACKUP_SPOOL_THRESHOLD", threshold)
+    body = json.dumps(_payload()).encode()
+    content = iter([body[:100], body[100:]]) if chunked else body
+
+    response = TestClient(main.app).post("/backup", content=content)
+
+    assert response.status_code == 200
+    assert response.json()["transactions_backed_up"] == 3
+    assert connections[0].closed
+
+
+# _BackupWriter
+
+def test_backup_writer_borrows_on_first_write(connections, monkeypatch):
+    monkeypatch.setattr(main, "BACKUP_BATCH_SIZE", 3)
+    rows = main._decode_backup(json.dumps([_transaction(i) for i in range(4)]),
+                               List[main.Transaction])
+    writer = main._BackupWriter()
+
+    writer.add("transactions", rows[:2])
+    assert not connections
+    writer.add("transactions", rows[2:])
+    (connection,) = connections
+    assert connection.events == ["start"]
+    assert writer.pending["transactions"] == [msgspec.structs.astuple(rows[3])]
+
+
+def test_backup_writer_close_without_writes(connections):
+    writer = main._BackupWriter()
+
+    writer.add("budgets", [])
+    writer.close()
+    assert not connections
+
+
+def test_backup_writer_close_rolls_back_uncommitted(connections, monkeypatch):
+    monkeypatch.setattr(main, "BACKUP_BATCH_SIZE", 1)
+    writer = main._BackupWriter()
+
+    writer.add("transactions", main._decode_backup(
+        json.dumps([_transaction(0)]), List[main.Transaction]
+    ))
+    writer.close()
+
+    (connection,) = connections
+    assert connection.events == ["start", "rollback"]
+    assert connection.closed
+    assert all(cursor.closed for cursor in connection.cursors)
+
+
+def test_backup_writer_close_after_commit(connections):
+    writer = main._BackupWriter()
+    writer.add("categories", main._decode_backup(
+        json.dumps([{"id": "c1", "name": "Food", "type": "expense", "created_at": "c"}]),
+        List[main.Category]
+    ))
+
+    assert writer.commit() == {"transactions": 0, "budgets": 0, "categories": 1}
+    writer.close()
+
+    (connection,) = connections
+    assert connection.events == ["start", "commit"]
+    assert connection.closed
+
+
+# restore()
+
+def test_restore_releases_connections_when_a_query_fails(connections, monkeypatch):
+    def execute(cursor, statement, params=None):
+        if "FROM budgets" in statement:
+            raise main.Error(msg="boom")
+        cursor.executed.append((statement, params))
+
+    monkeypatch.setattr(FakeCursor, "execute", execute)
+
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(main.restore())
+
+    assert error.value.status_code == 500
+    assert len(connections) == 3
+    assert all(connection.closed for connection in connections)
+    assert all(cursor.closed for connection in connections for cursor in connection.cursors)
+
+
+# /health
+
+class FakePool:
+    def __init__(self, error=None):
+        self.error = error
+        self.borrowed = []
+
+    def get_connection(self):
+        if self.error is not None:
+            raise self.error
+        self.borrowed.append(FakeConnection())
+        return self.borrowed[-1]
+
+
+@pytest.fixture
+def health_state(monkeypatch):
+    monkeypatch.setattr(main.app.state, "last_health_ok_ts", float("-inf"), raising=False)
+    return main.app.state
+
+
+def test_health_check_caches_success(health_state, monkeypatch):
+    monkeypatch.setattr(health_state, "pool", FakePool(), raising=False)
+
+    for _ in range(3):
+        assert asyncio.run(main.health_check())["database"] == "connected"
+
+    (connection,) = health_state.pool.borrowed
+    assert connection.events == ["ping"] and connection.closed
+
+
+def test_health_check_rechecks_after_ttl(health_state, monkeypatch):
+    monkeypatch.setattr(health_state, "pool", FakePool(), raising=False)
+    monkeypatch.setattr(main, "HEALTH_CHECK_TTL", 0)
+
+    asyncio.run(main.health_check())
+    asyncio.run(main.health_check())
+
+    assert len(health_state.pool.borrowed) == 2
+
+
+def test_health_check_busy_pool_is_healthy(health_state, monkeypatch):
+    monkeypatch.setattr(health_state, "pool", FakePool(main.PoolError("pool exhausted")),
+                        raising=False)
+    monkeypatch.setattr(main, "DB_POOL_TIMEOUT", 60)
+
+    result = asyncio.run(main.health_check())
+
+    assert result["status"] == "healthy"
+    assert result["database"] == "busy"
+    assert health_state.last_health_ok_ts == float("-inf")
+
+
+def test_health_check_failed_ping_is_unhealthy(health_state, monkeypatch):
+    def ping(connection, **kwargs):
+        raise main.Error(msg="gone away")
+
+    monkeypatch.setattr(health_state, "pool", FakePool(), raising=False)
+    monkeypatch.setattr(FakeConnection, "ping", ping)
+
+    result = asyncio.run(main.health_check())
+
+    assert result["status"] == "unhealthy"
+    assert health_state.pool.borrowed[0].closed
+
+
+# Backup models
+
+def test_backup_rows_keep_pydantic_lax_coercion():
+    (row,) = main._decode_backup(
+        json.dumps([_transaction(0, amount="12.50", synced=True)]), List[main.Transaction]
+    )
+
+    assert msgspec.structs.astuple(row) == (
+        "t0", datetime.date(2024, 1, 31), "Food", "expense", 12.5,
+        "Lunch", "2024-01-31 12:00", "2024-01-31 12:00", True
+    )
+
+
+def test_backup_request_body_in_openapi():
+    schema = TestClient(main.app).get("/openapi.json").json()
+    body = schema["paths"]["/backup"]["post"]["requestBody"]
+
+    assert body["required"] is True
+    backup = body["content"]["application/json"]["schema"]
+    assert backup["required"] == ["transactions", "budgets", "categories"]
+    transaction = backup["properties"]["transactions"]["items"]
+    assert transaction["properties"]["id"] == {"type": "string", "maxLength": 36}
+    assert "$ref" not in json.dumps(body)
+
+
+# LOAD DATA staging
+
+@pytest.fixture
+def staging(connections, monkeypatch, tmp_path):
+    """Route large backups through LOAD DATA, recording each staged file"""
+    monkeypatch.setattr(main, "BACKUP_STAGING_DIR", str(tmp_path))
+    monkeypatch.setattr(main, "BACKUP_BATCH_SIZE", 2)
+    monkeypatch.setattr(main, "LOAD_DATA_THRESHOLD", 3)
+    staged = []
+    execute = FakeCursor.execute
+
+    def record(cursor, statement, params=None):
+        if "LOAD DATA" in statement:
+            with open(statement.split("'")[1], encoding="utf-8") as staged_file:
+                staged.append(staged_file.read())
+        execute(cursor, statement, params)
+
+    monkeypatch.setattr(FakeCursor, "execute", record)
+    return staged
+
+
+def test_backup_switches_to_load_data_past_threshold(connections, staging, tmp_path):
+    body = json.dumps(_payload(6)).encode()
+
+    writer, counts = _write(body, spooled=True)
+    assert len(list(tmp_path.iterdir())) == 1
+    writer.close()
+
+    (connection,) = connections
+    inserts = [s for s in connection.executed if s.startswith("INSERT INTO Transactions")]
+    # One batched insert before the threshold, then one INSERT ... SELECT merge
+    assert len(inserts) == 2 and "FROM tx_stage" in inserts[-1]
+    (staged,) = staging
+    assert staged.splitlines() == [
+        f"t{i}\t2024-01-31\tFood\texpense\t12.5\tLunch\t2024-01-31 12:00\t2024-01-31 12:00\t1"
+        for i in range(2, 6)
+    ]
+    assert counts["transactions"] == 6
+    assert connection.events == ["start", "commit"]
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_backup_stays_batched_without_local_infile(connections, staging, monkeypatch):
+    monkeypatch.setattr(FakeCursor, "local_infile", 0)
+
+    _write(json.dumps(_payload(6)).encode(), spooled=False)
+
+    (connection,) = connections
+    assert not staging
+    assert not any("tx_stage" in statement for statement in connection.executed)
+
+
+def test_load_data_warnings_roll_back(connections, staging, monkeypatch, tmp_path):
+    execute = FakeCursor.execute
+
+    def warn(cursor, statement, params=None):
+        execute(cursor, statement, params)
+        cursor.warning_count = 2 if "LOAD DATA" in statement else 0
+        if statement == "SHOW WARNINGS":
+            cursor.rows = [("Note", 1265, "Data truncated for column 'amount' at row 1"),
+                           ("Warning", 1265, "Data truncated for column 'id' at row 2")]
+
+    monkeypatch.setattr(FakeCursor, "execute", warn)
+    writer = main._BackupWriter()
+
+    with pytest.raises(main.Error) as error:
+        main._write_backup(writer, json.dumps(_payload(6)).encode())
+    writer.close()
+
+    assert error.value.errno == 1265
+    assert "column 'id'" in error.value.msg
+    (connection,) = connections
+    assert connection.events == ["start", "rollback"]
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_load_data_notes_are_allowed():
+    cursor = FakeCursor()
+    cursor.warning_count = 1
+    cursor.execute = lambda statement, params=None: setattr(
+        cursor, "rows", [("Note", 1265, "Data truncated for column 'amount' at row 1")]
+    )
+
+    main._BackupWriter._check_load_warnings(cursor)
+
+
+@pytest.mark.parametrize("value, expected", [
+    (None, "\\N"),
+    ("plain", "plain"),
+    ("a\tb", "a\\tb"),
+    ("a\nb", "a\\nb"),
+    ("C:\\path", "C:\\\\path"),
+    ("\\N", "\\\\N"),
+    (12.5, "12.5"),
+    (datetime.date(2024, 1, 31), "2024-01-31"),
+    (True, "1"),
+    (False, "0"),
+])
+def test_infile_field_escaping(value, expected):
+    assert main._infile_field(value) == expected
+
+
+@pytest.mark.parametrize("field, value", [
+    ("id", "x" * 37),
+    ("category", "x" * 101),
+    ("type", "x" * 11),
+    ("created_at", "x" * 21),
+    ("amount", 100000000),
+])
+def test_backup_rows_are_bounded_like_their_columns(field, value):
+    with pytest.raises(HTTPException) as error:
+        main._decode_backup(json.dumps([_transaction(0, **{field: value})]),
+                            List[main.Transaction], "transactions")
+    assert error.value.detail.endswith(f"- at `$.transactions[0].{field}`")
+
+
+# Restore streaming
+
+def _restore(transactions, budgets=(), categories=()):
+    """Run _stream_restore and return the body and the lease"""
+    connection = FakeConnection()
+    lease = main._ConnectionLease(connection, FakeCursor(transactions))
+
+    async def collect():
+        return b"".join([
+            chunk async for chunk in main._stream_restore(lease, [list(budgets), list(categories)])
+        ])
+    return asyncio.run(collect()), lease
+
+
+def test_stream_restore_empty_tables():
+    body, lease = _restore([])
+
+    assert body == b'{"transactions":[],"budgets":[],"categories":[]}'
+    assert lease.released and lease.connection.closed and lease.cursor.closed
+
+
+def test_stream_restore_body():
+    transactions = [{"id": "t1", "amount": 12.5}, {"id": "t2", "amount": -3.0}]
+    budgets = [{"id": "b1", "monthly_limit": 300.0}]
+    categories = [{"id": "c1", "icon": None}]
+
+    body, _ = _restore(transactions, budgets, categories)
+
+    assert json.loads(body) == {
+        "transactions": transactions, "budgets": budgets, "categories": categories
+    }
+
+
+def test_connection_lease_releases_once():
+    lease = main._ConnectionLease(FakeConnection(), FakeCursor())
+    closes = []
+    lease.connection.close = lambda: closes.append(True)
+
+    asyncio.run(lease.release())
+    asyncio.run(lease.release())
+
+    assert closes == [True]
+
+
+def test_leased_response_releases_when_body_never_starts():
+    lease = main._ConnectionLease(FakeConnection(), FakeCursor())
+    response = main._LeasedStreamingResponse(main._stream_restore(lease, [[], []]), lease)
+
+    async def receive():
+        await asyncio.sleep(10)
+
+    async def send(message):
+        raise OSError("client went away")
+
+    with pytest.raises(BaseException):
+        asyncio.run(response({"type": "http", "asgi": {"spec_version": "2.4"}}, receive, send))
+
+    assert lease.released and lease.connection.closed
+
+
+def test_stream_restore_reads_transactions_in_batches(monkeypatch):
+    monkeypatch.setattr(main, "RESTORE_FETCH_SIZE", 2)
+    transactions = [{"id": f"t{i}", "amount": i + 0.5} for i in range(5)]
+    fetches = []
+    fetchmany = FakeCursor.fetchmany
+
+    def record(cursor, size):
+        fetches.append(size)
+        return fetchmany(cursor, size)
+
+    monkeypatch.setattr(FakeCursor, "fetchmany", record)
+
+    body, lease = _restore(transactions)
+
+    assert json.loads(body)["transactions"] == transactions
+    # Three full or partial batches, then the empty fetch that ends the loop
+    assert fetches == [2, 2, 2, 2]
+    assert lease.released
+
+
+# Batched statements
+
+def test_batch_statement_reuses_the_string_object():
+    _, statement, placeholder = main.BACKUP_SECTIONS["budgets"]
+
+    first = main._batch_statement(statement, placeholder, 3)
+
+    assert main._batch_statement(statement, placeholder, 3) is first
+    assert first.count("(%s, %s, %s, %s, %s)") == 3
+
+
+def test_execute_batched_sends_one_statement_object_per_batch_size(monkeypatch):
+    monkeypatch.setattr(main, "BACKUP_BATCH_SIZE", 2)
+    _, statement, placeholder = main.BACKUP_SECTIONS["categories"]
+    sent = []
+    cursor = FakeCursor()
+    cursor.execute = lambda operation, params: sent.append((operation, params))
+
+    main._execute_batched(cursor, statement, placeholder, [(i,) * 5 for i in range(5)])
+
+    assert [len(params) for _, params in sent] == [10, 10, 5]
+    # A prepared cursor only re-prepares when the operation object changes
+    assert sent[0][0] is sent[1][0]
+    assert sent[2][0] is not sent[1][0]
+
+
+# get_db_connection
+
+class ExhaustedPool:
+    """Raises PoolError until `free_after` attempts have been made"""
+
+    def __init__(self, free_after=None):
+        self.free_after = free_after
+        self.attempts = 0
+
+    def get_connection(self):
+        self.attempts += 1
+        if self.free_after is None or self.attempts <= self.free_after:
+            raise main.PoolError("Failed getting connection; pool exhausted")
+        return FakeConnection()
+
+
+def test_get_db_connection_waits_for_a_free_connection(monkeypatch):
+    monkeypatch.setattr(main.app.state, "pool", ExhaustedPool(free_after=2), raising=False)
+    monkeypatch.setattr(main.time, "sleep", lambda seconds: None)
+
+    connection = main.get_db_connection()
+
+    assert connection.events == ["ping"]
+    assert main.app.state.pool.attempts == 3
+
+
+def test_get_db_connection_times_out_with_503(monkeypatch):
+    monkeypatch.setattr(main.app.state, "pool", ExhaustedPool(), raising=False)
+    monkeypatch.setattr(main, "DB_POOL_TIMEOUT", 0.2)
+
+    with pytest.raises(HTTPException) as error:
+        main.get_db_connection()
+
+    assert error.value.status_code == 503
+    assert main.app.state.pool.attempts > 1